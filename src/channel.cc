@@ -32,6 +32,7 @@ class SQLite : public tll::channel::Base<SQLite>
 	bool _replace = false;
 	enum class Index { No, Yes, Unique } _seq_index = Index::Unique;
 	enum class Journal { Default, Wal } _journal = Journal::Wal;
+	enum class Sync { Default, Off, Normal, Full } _sync = Sync::Default;
 
 	size_t _bulk_size = 0;
 	size_t _bulk_counter = 0;
@@ -81,6 +82,7 @@ int SQLite::_init(const Channel::Url &url, Channel * master)
 	_replace = reader.getT("replace", false);
 	_seq_index = reader.getT("seq-index", Index::Unique, {{"no", Index::No}, {"yes", Index::Yes}, {"unique", Index::Unique}});
 	_journal = reader.getT("journal", Journal::Wal, {{"wal", Journal::Wal}, {"default", Journal::Default}});
+	_sync = reader.getT("synchronous", Sync::Default, {{"default", Sync::Default}, {"off", Sync::Off}, {"normal", Sync::Normal}, {"full", Sync::Full}});
 	_bulk_size = reader.getT("bulk-size", 0u);
 	if (!reader)
 		return _log.fail(EINVAL, "Invalid url: {}", reader.error());
@@ -93,7 +95,7 @@ int SQLite::_open(const PropsView &s)
 	_bulk_counter = 0;
 
 	sqlite3 * db = nullptr;
-	int flags = SQLITE_OPEN_READWRITE | SQLITE_OPEN_CREATE;
+	int flags = SQLITE_OPEN_READWRITE | SQLITE_OPEN_CREATE | SQLITE_OPEN_URI;
 	auto r = sqlite3_open_v2(_path.c_str(), &db, flags, nullptr);
 	if (r)
 		return _log.fail(EINVAL, "Failed to open '{}': {}", _path, sqlite3_errstr(r));
@@ -104,6 +106,17 @@ int SQLite::_open(const PropsView &s)
 			return _log.fail(EINVAL, "Failed to change journal_mode to WAL: {}", sqlite3_errmsg(_db.get()));
 	}
 
+	if (_sync != Sync::Default) {
+		std::string_view mode = "full";
+		switch (_sync) {
+		case Sync::Off: mode = "off"; break;
+		case Sync::Normal: mode = "normal"; break;
+		default: break;
+		}
+		if (sqlite3_exec(_db.get(), fmt::format("PRAGMA synchronous={}", mode).c_str(), 0, 0, 0))
+			return _log.fail(EINVAL, "Failed to change synchronous to {}: {}", mode, sqlite3_errmsg(_db.get()));
+	}
+
 	for (auto & m : tll::util::list_wrap(_scheme->messages)) {
 		if (m.msgid == 0) {
 			_log.debug("Message {} has no msgid, skip table check", m.name);
@@ -362,7 +375,9 @@ int SQLite::_post(const tll_msg_t *msg, int flags)
 		return _log.fail(ENOENT, "Message {} not found", msg->msgid);
 	auto & [message, insert] = it->second;
 
-	if (!_bulk_counter) {
+	// With bulk-size <= 1 each insert is committed on its own, let SQLite autocommit
+	const bool bulk = _bulk_size > 1;
+	if (bulk && !_bulk_counter) {
 		sqlite3_exec(_db.get(), "BEGIN", 0, 0, 0);
 	}
 
@@ -379,7 +394,7 @@ int SQLite::_post(const tll_msg_t *msg, int flags)
 	auto r = sqlite3_step(insert.get());
 	if (r != SQLITE_DONE)
 		return _log.fail(EINVAL, "Failed to insert data: {}", sqlite3_errmsg(_db.get()));
-	if (++_bulk_counter >= _bulk_size) {
+	if (bulk && ++_bulk_counter >= _bulk_size) {
 		_log.debug("Commit");
 		if (sqlite3_exec(_db.get(), "COMMIT", 0, 0, 0))
 			_log.error("Commit failed: {}", sqlite3_errmsg(_db.get()));
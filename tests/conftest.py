@@ -4,7 +4,61 @@
 import pytest
 
 import pathlib
+import sqlite3
 import tempfile
+import uuid
+
+from tll.error import TLLError
+
+SCHEME = '''yamls://
+- name: ignored
+  fields:
+    - {name: s0, type: '**int8'}
+- name: scalar
+  id: 10
+  fields:
+    - {name: i8, type: int8, options.sql.index: unique}
+    - {name: i16, type: int16, options.sql.index: yes}
+    - {name: i32, type: int32}
+    - {name: i64, type: int64}
+    - {name: u8, type: uint8}
+    - {name: u16, type: uint16}
+    - {name: u32, type: uint32}
+    - {name: d, type: double}
+- name: text
+  id: 20
+  fields:
+    - {name: b, type: byte8}
+    - {name: f, type: byte32, options.type: string}
+    - {name: s, type: string, options.sql.primary-key: true}
+'''
+
+@pytest.fixture(scope='session')
+def scheme():
+    return SCHEME
+
+def _open_db(path):
+    db = sqlite3.connect(path, isolation_level=None, uri=path.startswith('file:'), cached_statements=256, check_same_thread=False)
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL')
+    db.execute('PRAGMA temp_store=MEMORY')
+    db.execute('PRAGMA cache_size=-64000')
+    return db
+
+@pytest.fixture
+def db_file_memory():
+    return f'file:memdb_{uuid.uuid4().hex}?mode=memory&cache=shared'
+
+def post_many(channel, name, rows, seqs=None):
+    if seqs is None:
+        seqs = range(len(rows))
+    errors = []
+    for seq, row in zip(seqs, rows):
+        try:
+            channel.post(name=name, data=row, seq=seq)
+        except TLLError as e:
+            errors.append((seq, e))
+    return errors
 
 version = tuple([int(x) for x in pytest.__version__.split('.')[:2]])
 